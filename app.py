@@ -7,21 +7,45 @@ except ImportError:
 import os
 import csv
 import json
-from datetime import datetime
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import islice
+
+import threading
+from urllib.parse import urlparse
+
+import click
+from sqlalchemy import case, func, literal
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
-from flask import jsonify
+from flask import jsonify, abort
+
+from thumbnails import MAX_IMAGE_BYTES, RejectedImage, ThumbnailCache, urllib_fetcher
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-here'  # Required for sessions
 
 # Database (SQLite) configuration
 basedir = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(basedir, 'app.db')
+# PLURPGH_DATABASE_URI lets tools such as loadtest.py point the app at a scratch database
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('PLURPGH_DATABASE_URI',
+                                                       'sqlite:///' + os.path.join(basedir, 'app.db'))
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db = SQLAlchemy(app)
 
+# Thumbnail proxy: images are fetched once, resized and cached on disk
+app.config['THUMBNAIL_CACHE_DIR'] = os.path.join(basedir, 'thumbnail_cache')
+app.config['THUMBNAIL_CACHE_MAX_BYTES'] = 100 * 1024 * 1024
+# Only the sizes templates request; the route rejects others and the warmer fetches these
+app.config['THUMBNAIL_SIZES'] = (400,)
+app.config['THUMBNAIL_ALLOWED_HOSTS'] = ('googleusercontent.com',)
+app.config['THUMBNAIL_FETCHER'] = urllib_fetcher
+app.config['THUMBNAIL_MAX_IMAGE_BYTES'] = MAX_IMAGE_BYTES
+app.config['THUMBNAIL_MAX_AGE'] = 365 * 24 * 3600
+
 # Reuse the data loading and scoring logic from the original script
 def load_data(filepath='plurpgh.csv'):
     data = []
@@ -34,6 +58,16 @@ def load_data(filepath='plurpgh.csv'):
     except FileNotFoundError:
         return []
 
+def iter_csv_chunks(filepath, chunk_size=5000):
+    """Stream a CSV file as lists of at most ``chunk_size`` row dicts."""
+    with open(filepath, mode='r', encoding='utf-8', errors='replace', newline='') as f:
+        reader = csv.DictReader(f)
+        while True:
+            chunk = list(islice(reader, chunk_size))
+            if not chunk:
+                break
+            yield chunk
+
 def calculate_scores(data, user_zip, user_budget, user_types, user_prefs):
     price_rank = {'$': 1, '$$': 2, '$$$': 3}
     user_rank = price_rank.get(user_budget, 1)
@@ -108,6 +142,71 @@ class Result(db.Model):
     venues_json = db.Column(db.Text)
 
 
+# Venue columns keyed by their header in plurpgh.csv
+VENUE_CSV_COLUMNS = {
+    'title': 'title',
+    'Zip Code': 'zip_code',
+    'website': 'website',
+    'latitude': 'latitude',
+    'longitude': 'longitude',
+    'type': 'type',
+    'Activity': 'activity',
+    'Adult Club': 'adult_club',
+    'LGBT +': 'lgbt',
+    'price': 'price',
+    'thumbnail': 'thumbnail',
+    'description': 'description',
+}
+PRICE_TIERS = ['$', '$$', '$$$']
+# Quiz preference -> Venue column
+PREF_COLUMNS = {'LGBT +': 'lgbt', 'Adult Club': 'adult_club', 'Activity': 'activity'}
+
+
+class Venue(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(300), unique=True, nullable=False)
+    title = db.Column(db.String(200), nullable=False)
+    zip_code = db.Column(db.String(20), index=True)
+    website = db.Column(db.String(300))
+    latitude = db.Column(db.Float, index=True)
+    longitude = db.Column(db.Float, index=True)
+    type = db.Column(db.String(100), index=True)
+    activity = db.Column(db.String(10), index=True)
+    adult_club = db.Column(db.String(10), index=True)
+    lgbt = db.Column(db.String(10), index=True)
+    price = db.Column(db.String(10), index=True)
+    thumbnail = db.Column(db.Text)
+    description = db.Column(db.Text)
+
+    @staticmethod
+    def make_key(title, zip_code):
+        """Stable dedupe key: case/whitespace-insensitive title plus zip."""
+        return ' '.join((title or '').lower().split()) + '|' + (zip_code or '').strip()
+
+    @classmethod
+    def from_csv_row(cls, row):
+        """Convert a CSV row dict into column values for a bulk insert."""
+        values = {}
+        for header, column in VENUE_CSV_COLUMNS.items():
+            val = (row.get(header) or '').strip()
+            if column in ('latitude', 'longitude'):
+                try:
+                    val = float(val)
+                except ValueError:
+                    val = None
+            values[column] = val
+        values['key'] = cls.make_key(values['title'], values['zip_code'])
+        return values
+
+    def to_row(self):
+        """Return the venue in the same dict shape load_data() produces."""
+        row = {}
+        for header, column in VENUE_CSV_COLUMNS.items():
+            val = getattr(self, column)
+            row[header] = '' if val is None else val
+        return row
+
+
 # --- Posts / Comments / Chat Models ---
 class Post(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -141,6 +240,274 @@ class ChatMessage(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
 
+# --- Analytics ---
+class AnalyticsCounter(db.Model):
+    """Daily counter for one (kind, key) pair, e.g. ('venue', 'blue moon|15201')."""
+    __table_args__ = (db.UniqueConstraint('kind', 'key', 'bucket'),)
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False, index=True)
+    key = db.Column(db.String(200), nullable=False, default='')
+    bucket = db.Column(db.Date, nullable=False, index=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    # Display name for keys that are not human readable (venue title)
+    label = db.Column(db.String(200))
+
+
+ANALYTICS_KINDS = ['venue', 'zip', 'type', 'budget', 'pref']
+
+
+# Create any missing tables at import so routes also work under `flask run`
+# or a WSGI server, not only when started through `python app.py`
+with app.app_context():
+    db.create_all()
+
+
+def import_venues(filepath='plurpgh.csv', chunk_size=5000):
+    """Stream a venue CSV into the Venue table.
+
+    Rows are deduped on Venue.key and upserted with one executemany per
+    chunk, each chunk in its own transaction. Returns the number of rows read.
+    """
+    table = Venue.__table__
+    stmt = sqlite_insert(table)
+    update_cols = {c: stmt.excluded[c] for c in VENUE_CSV_COLUMNS.values()}
+    stmt = stmt.on_conflict_do_update(index_elements=['key'], set_=update_cols)
+
+    total = 0
+    for chunk in iter_csv_chunks(filepath, chunk_size):
+        batch = {}
+        for row in chunk:
+            values = Venue.from_csv_row(row)
+            if values['title']:
+                batch[values['key']] = values
+        total += len(chunk)
+        if batch:
+            with db.engine.begin() as conn:
+                conn.execute(stmt, list(batch.values()))
+    return total
+
+
+def has_venues():
+    """True once the Venue table exists and has been populated by import_venues()."""
+    try:
+        return db.session.query(Venue.id).first() is not None
+    except OperationalError:
+        # e.g. "no such table: venue" on a database created before the table existed
+        db.session.rollback()
+        return False
+
+
+def load_venues(with_coords=False):
+    """All venue rows (for the map), falling back to the CSV when the table is empty."""
+    if not has_venues():
+        data = load_data()
+        if with_coords:
+            data = [row for row in data if row.get('latitude') and row.get('longitude')]
+        return data
+
+    query = Venue.query
+    if with_coords:
+        query = query.filter(Venue.latitude.isnot(None), Venue.longitude.isnot(None))
+    return [v.to_row() for v in query.order_by(Venue.id)]
+
+
+def top_venues(user_zip, user_budget, user_types, user_prefs, limit=3):
+    """
+    calculate_scores() done in SQL: the score is a CASE expression over the
+    indexed columns, so only the top ``limit`` rows ever leave SQLite.
+    Ties keep catalog (id) order, as the stable sort in calculate_scores does.
+    """
+    price_rank = {tier: i + 1 for i, tier in enumerate(PRICE_TIERS)}
+    user_rank = price_rank.get(user_budget, 1)
+
+    parts = []
+    # 1. Preferences (+50 points each)
+    for pref in user_prefs:
+        column = PREF_COLUMNS.get(pref)
+        if column:
+            col = getattr(Venue, column)
+            parts.append(case(((col != '') & (col != '0'), 50), else_=0))
+    # 2. Type Match (+30 points)
+    if user_types:
+        parts.append(case((Venue.type.in_(user_types), 30), else_=0))
+    # 3. Zip Code Match (+20 points)
+    parts.append(case((Venue.zip_code == user_zip, 20), else_=0))
+    # 4. Budget Weighting: 15 for exact match, -5 per step cheaper
+    affordable = PRICE_TIERS[:user_rank]
+    parts.append(case(*[(Venue.price == tier, max(0, 15 - (user_rank - price_rank[tier]) * 5))
+                        for tier in affordable], else_=0))
+    score = sum(parts, literal(0)).label('match_score')
+
+    # Venues over budget score -1000 and are dropped, so exclude them up front
+    query = db.session.query(Venue, score) \
+        .filter(Venue.price.in_(affordable) | ~Venue.price.in_(PRICE_TIERS)) \
+        .order_by(score.desc(), Venue.id) \
+        .limit(limit)
+    out = []
+    for venue, match_score in query:
+        row = venue.to_row()
+        row['match_score'] = match_score
+        out.append(row)
+    return out
+
+
+def load_venue_types():
+    """Sorted distinct venue types, from the database when populated."""
+    if not has_venues():
+        data = load_data()
+        return sorted(list(set(row.get('type', '').strip() for row in data if row.get('type'))))
+    rows = db.session.query(Venue.type).filter(Venue.type != '').distinct().order_by(Venue.type)
+    return [t for (t,) in rows]
+
+
+@app.cli.command('import-venues')
+@click.argument('filepath', default='plurpgh.csv')
+@click.option('--chunk-size', default=5000, show_default=True)
+def import_venues_command(filepath, chunk_size):
+    """Import (upsert) venues from a CSV file into app.db."""
+    db.create_all()
+    total = import_venues(filepath, chunk_size)
+    click.echo(f'Imported {total} rows, {Venue.query.count()} venues stored.')
+
+
+def record_result_analytics(user_zip, user_budget, user_types, user_prefs, venues, when=None):
+    """Bump the daily counters for one recorded result.
+
+    Runs in the caller's session so counters commit (or roll back) together
+    with the Result row. Each counter is an atomic SQL upsert.
+    """
+    bucket = (when or datetime.utcnow()).date()
+    increments = Counter()
+    labels = {}
+    increments[('query', '')] += 1
+    increments[('zip', user_zip)] += 1
+    increments[('budget', user_budget)] += 1
+    for t in user_types:
+        increments[('type', t)] += 1
+    for p in user_prefs:
+        increments[('pref', p)] += 1
+    for v in venues:
+        # Same title can exist in several zip codes; key on the Venue dedupe key
+        key = Venue.make_key(v.get('title'), v.get('Zip Code'))
+        increments[('venue', key)] += 1
+        labels[key] = v.get('title', '')
+
+    table = AnalyticsCounter.__table__
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(index_elements=['kind', 'key', 'bucket'],
+                                      set_={'count': table.c.count + stmt.excluded.count,
+                                            'label': stmt.excluded.label})
+    rows = [{'kind': kind, 'key': key, 'bucket': bucket, 'count': n, 'label': labels.get(key)}
+            for (kind, key), n in increments.items()]
+    db.session.execute(stmt, rows)
+
+
+def analytics_report(days=None, limit=10):
+    """Summarise the counters, optionally over the last ``days`` days only."""
+    since = None
+    if days:
+        since = datetime.utcnow().date() - timedelta(days=days - 1)
+
+    totals = db.session.query(AnalyticsCounter.kind, AnalyticsCounter.key,
+                              func.sum(AnalyticsCounter.count), func.max(AnalyticsCounter.label))
+    daily = db.session.query(AnalyticsCounter.bucket, AnalyticsCounter.count) \
+        .filter(AnalyticsCounter.kind == 'query')
+    if since:
+        totals = totals.filter(AnalyticsCounter.bucket >= since)
+        daily = daily.filter(AnalyticsCounter.bucket >= since)
+
+    report = {kind: [] for kind in ANALYTICS_KINDS}
+    queries = 0
+    for kind, key, total, label in totals.group_by(AnalyticsCounter.kind, AnalyticsCounter.key):
+        if kind == 'query':
+            queries = total
+        elif kind == 'venue':
+            report[kind].append({'key': key, 'title': label or key, 'count': total})
+        elif kind in report:
+            report[kind].append({'key': key, 'count': total})
+    for kind in ANALYTICS_KINDS:
+        report[kind].sort(key=lambda x: (-x['count'], x['key']))
+        report[kind] = report[kind][:limit]
+
+    report['queries'] = queries
+    report['daily'] = [{'date': bucket.isoformat(), 'queries': n}
+                       for bucket, n in daily.order_by(AnalyticsCounter.bucket)]
+    return report
+
+
+@app.cli.command('rebuild-analytics')
+def rebuild_analytics_command():
+    """Recompute the analytics counters from every stored Result."""
+    db.create_all()
+    AnalyticsCounter.query.delete()
+    n = 0
+    for r in Result.query.order_by(Result.id).yield_per(1000):
+        try:
+            venues = json.loads(r.venues_json or '[]')
+        except Exception:
+            venues = []
+        record_result_analytics(r.user_zip or '', r.user_budget or '',
+                                r.user_types.split(',') if r.user_types else [],
+                                r.user_prefs.split(',') if r.user_prefs else [],
+                                venues, when=r.timestamp)
+        n += 1
+    db.session.commit()
+    click.echo(f'Rebuilt analytics from {n} results.')
+
+
+def get_thumbnail_cache():
+    """The app's ThumbnailCache, created from config on first use."""
+    cache = app.extensions.get('thumbnail_cache')
+    if cache is None:
+        cache = ThumbnailCache(app.config['THUMBNAIL_CACHE_DIR'],
+                               max_bytes=app.config['THUMBNAIL_CACHE_MAX_BYTES'],
+                               fetcher=app.config['THUMBNAIL_FETCHER'],
+                               max_image_bytes=app.config['THUMBNAIL_MAX_IMAGE_BYTES'])
+        app.extensions['thumbnail_cache'] = cache
+    return cache
+
+
+def thumbnail_allowed(url):
+    """Only proxy http(s) images from the configured hosts."""
+    parsed = urlparse(url or '')
+    host = parsed.hostname or ''
+    if parsed.scheme not in ('http', 'https'):
+        return False
+    return any(host == h or host.endswith('.' + h) for h in app.config['THUMBNAIL_ALLOWED_HOSTS'])
+
+
+def catalog_thumbnail(venue_key):
+    """The thumbnail URL stored for a venue key, or None for unknown venues."""
+    if has_venues():
+        return db.session.query(Venue.thumbnail).filter_by(key=venue_key).scalar()
+    for row in load_data():
+        if Venue.make_key(row.get('title'), row.get('Zip Code')) == venue_key:
+            return row.get('thumbnail')
+    return None
+
+
+@app.template_filter('thumbnail_src')
+def thumbnail_src(venue, size=400):
+    """Route a venue's allowed thumbnail through the local cache; leave others as-is."""
+    url = venue.get('thumbnail')
+    if thumbnail_allowed(url):
+        return url_for('thumbnail', venue=Venue.make_key(venue.get('title'), venue.get('Zip Code')), size=size)
+    return url
+
+
+def start_thumbnail_warmer():
+    """Fetch every catalog thumbnail in the served sizes on a background thread."""
+    if has_venues():
+        urls = [url for (url,) in db.session.query(Venue.thumbnail).distinct()]
+    else:
+        urls = [row.get('thumbnail') for row in load_data()]
+    urls = list(dict.fromkeys(u for u in urls if thumbnail_allowed(u)))
+    cache = get_thumbnail_cache()
+    t = threading.Thread(target=cache.warm, args=(urls, app.config['THUMBNAIL_SIZES']), daemon=True)
+    t.start()
+    return t
+
+
 @app.route('/')
 def home():
     return render_template('home.html')
@@ -307,12 +674,11 @@ def quiz():
         return redirect(url_for('results'))
     
     # GET request - show the quiz form
-    data = load_data()
-    if not data:
+    unique_types = load_venue_types()
+    if not unique_types:
         return "Error: CSV file not found", 500
     
-    # Extract unique types and define preferences
-    unique_types = sorted(list(set(row.get('type', '').strip() for row in data if row.get('type'))))
+    # Define preferences
     preferences = ['LGBT +', 'Adult Club', 'Activity']
     
     return render_template('quiz.html', types=unique_types, prefs=preferences)
@@ -328,12 +694,14 @@ def results():
     if not user_zip:
         return redirect(url_for('quiz'))
     
-    # Load data and calculate results
-    data = load_data()
-    if not data:
-        return "Error: CSV file not found", 500
-    
-    venues = calculate_scores(data, user_zip, user_budget, user_types, user_prefs)
+    # Score in SQL when the venue table is populated, else from the CSV
+    if has_venues():
+        venues = top_venues(user_zip, user_budget, user_types, user_prefs)
+    else:
+        data = load_data()
+        if not data:
+            return "Error: CSV file not found", 500
+        venues = calculate_scores(data, user_zip, user_budget, user_types, user_prefs)
 
     # If user is logged in, save the result snapshot
     user_id = session.get('user_id')
@@ -346,21 +714,50 @@ def results():
                        user_prefs=','.join(user_prefs) if user_prefs else '',
                        venues_json=json.dumps(venues))
             db.session.add(r)
+            record_result_analytics(user_zip, user_budget, user_types, user_prefs, venues)
             db.session.commit()
         except Exception:
             db.session.rollback()
 
     return render_template('results.html', venues=venues)
 
+@app.route('/analytics')
+def analytics():
+    days = request.args.get('days', type=int)
+    if 'days' in request.args and (days is None or days < 1):
+        return jsonify({'error': 'days must be a positive integer'}), 400
+    limit = max(1, min(request.args.get('limit', 10, type=int), 100))
+    return jsonify(analytics_report(days=days, limit=limit))
+
+@app.route('/thumbnail')
+def thumbnail():
+    size = request.args.get('size', 400, type=int)
+    if size not in app.config['THUMBNAIL_SIZES']:
+        abort(400)
+    # Only catalog images are proxied; callers name a venue, never a URL
+    src = catalog_thumbnail(request.args.get('venue', ''))
+    if not src:
+        abort(404)
+    if not thumbnail_allowed(src):
+        abort(403)
+    try:
+        data, mimetype = get_thumbnail_cache().get(src, size)
+    except RejectedImage:
+        # Never serve non-image or oversized content from our origin
+        abort(502)
+    except Exception:
+        # Upstream fetch failed; let the browser try the original image
+        return redirect(src)
+    resp = app.response_class(data, mimetype=mimetype)
+    resp.cache_control.public = True
+    resp.cache_control.max_age = app.config['THUMBNAIL_MAX_AGE']
+    resp.headers['X-Content-Type-Options'] = 'nosniff'
+    return resp
+
 @app.route('/about')
 def about():
-    # Load venue data for the map
-    data = load_data()
-    if not data:
-        venues = []
-    else:
-        # Filter out venues without coordinates
-        venues = [row for row in data if row.get('latitude') and row.get('longitude')]
+    # Load venue data with coordinates for the map
+    venues = load_venues(with_coords=True)
     
     return render_template('about.html', venues=venues)
 
@@ -377,5 +774,11 @@ if __name__ == '__main__':
     # Ensure DB tables exist
     with app.app_context():
         db.create_all()
+        # Seed the venue table from the bundled CSV on first run
+        if not has_venues():
+            import_venues()
+        # The debug reloader runs this block twice; only warm in the serving child
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            start_thumbnail_warmer()
 
     app.run(debug=True)
\ No newline at end of file
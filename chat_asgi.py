@@ -0,0 +1,250 @@
+"""
+Async serving mode for the community chat.
+
+Serves /chat/messages and /chat/send as a plain ASGI application so a
+waiting chat client costs one pending future instead of a worker thread.
+Every other path is handed to the unchanged Flask app through asgiref's
+WSGI adapter. Run it with an ASGI server, e.g.:
+
+    uvicorn chat_asgi:create_asgi_app --factory
+"""
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+try:
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError:
+    WsgiToAsgi = None
+
+from app import app as flask_app, db, User, ChatMessage
+
+# Same window the synchronous /chat/messages route returns
+MESSAGE_LIMIT = 200
+# Longest a client may park on /chat/messages?wait=...
+MAX_WAIT_SECONDS = 30
+MAX_BODY_BYTES = 64 * 1024
+
+
+class ChatBroker:
+    """
+    In-process pub/sub fan-out. Each waiting client holds one future;
+    publish() resolves all of them with the new message.
+    """
+
+    def __init__(self):
+        self.last_id = None
+        self._waiters = set()
+
+    def __len__(self):
+        return len(self._waiters)
+
+    def subscribe(self):
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.add(fut)
+        return fut
+
+    def unsubscribe(self, fut):
+        self._waiters.discard(fut)
+
+    def publish(self, message):
+        if self.last_id is None or message['id'] > self.last_id:
+            self.last_id = message['id']
+        waiters, self._waiters = self._waiters, set()
+        for fut in waiters:
+            if not fut.done():
+                fut.set_result(message)
+
+
+def serialize_message(m, username):
+    return {
+        'id': m.id,
+        'user': username or 'unknown',
+        'body': m.body,
+        'timestamp': m.timestamp.isoformat()
+    }
+
+
+class ChatService:
+    """
+    ASGI app for the chat endpoints. Database work runs in a small thread
+    pool, each call inside its own Flask app context, so the event loop
+    never blocks on SQLite.
+    """
+
+    def __init__(self, flask_app=flask_app, fallback=None, db_workers=4):
+        self.flask_app = flask_app
+        self.fallback = fallback
+        self.broker = ChatBroker()
+        self.executor = ThreadPoolExecutor(max_workers=db_workers, thread_name_prefix='chat-db')
+        self.serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+
+    # --- database (runs on the executor) ---
+    def _in_app_context(self, fn, *args):
+        with self.flask_app.app_context():
+            return fn(*args)
+
+    async def run_db(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._in_app_context, fn, *args)
+
+    @staticmethod
+    def _load_messages(after_id):
+        query = db.session.query(ChatMessage, User.username) \
+            .outerjoin(User, User.id == ChatMessage.user_id)
+        if after_id is None:
+            query = query.order_by(ChatMessage.timestamp.asc())
+        else:
+            query = query.filter(ChatMessage.id > after_id).order_by(ChatMessage.id.asc())
+        return [serialize_message(m, username) for m, username in query.limit(MESSAGE_LIMIT)]
+
+    @staticmethod
+    def _latest_id():
+        return db.session.query(db.func.max(ChatMessage.id)).scalar() or 0
+
+    @staticmethod
+    def _save_message(user_id, body):
+        m = ChatMessage(user_id=user_id, body=body)
+        db.session.add(m)
+        db.session.commit()
+        user = db.session.get(User, user_id)
+        return serialize_message(m, user.username if user else None)
+
+    # --- ASGI plumbing ---
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] == '/chat/messages' and scope['method'] == 'GET':
+            await self.messages(scope, receive, send)
+        elif scope['type'] == 'http' and scope['path'] == '/chat/send' and scope['method'] == 'POST':
+            await self.send_message(scope, receive, send)
+        elif scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif self.fallback is not None:
+            await self.fallback(scope, receive, send)
+        else:
+            await self.respond(send, 404, {'error': 'not found'})
+
+    async def lifespan(self, receive, send):
+        while True:
+            event = await receive()
+            if event['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif event['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def respond(send, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        await send({'type': 'http.response.start', 'status': status, 'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+            (b'x-chat-mode', b'async'),
+        ]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    @staticmethod
+    async def read_body(receive):
+        chunks, size = [], 0
+        while True:
+            event = await receive()
+            if event['type'] == 'http.disconnect':
+                return None
+            chunks.append(event.get('body', b''))
+            size += len(chunks[-1])
+            if size > MAX_BODY_BYTES:
+                return None
+            if not event.get('more_body'):
+                return b''.join(chunks)
+
+    def session_user_id(self, scope):
+        """
+        Read user_id from Flask's signed session cookie, enforcing the same
+        expiry as SecureCookieSessionInterface.open_session.
+        """
+        cookie_name = self.flask_app.config['SESSION_COOKIE_NAME']
+        max_age = int(self.flask_app.permanent_session_lifetime.total_seconds())
+        for name, value in scope.get('headers', []):
+            if name != b'cookie':
+                continue
+            for part in value.decode('latin-1').split(';'):
+                key, _, val = part.strip().partition('=')
+                if key == cookie_name and self.serializer is not None:
+                    try:
+                        return self.serializer.loads(val, max_age=max_age).get('user_id')
+                    except Exception:
+                        return None
+        return None
+
+    # --- endpoints ---
+    async def messages(self, scope, receive, send):
+        """
+        GET /chat/messages[?after=<id>[&wait=<seconds>]]
+        Without ``after`` this matches the synchronous route. With ``after``
+        only newer messages are returned; ``wait`` long-polls until one arrives.
+        """
+        args = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        try:
+            after_id = int(args['after'][0]) if 'after' in args else None
+            wait = min(float(args.get('wait', ['0'])[0]), MAX_WAIT_SECONDS)
+        except ValueError:
+            await self.respond(send, 400, {'error': 'bad request'})
+            return
+
+        if after_id is None or not wait > 0:
+            await self.respond(send, 200, await self.run_db(self._load_messages, after_id))
+            return
+
+        # Subscribe before checking so a message sent in between is not missed
+        fut = self.broker.subscribe()
+        try:
+            if self.broker.last_id is None:
+                latest = await self.run_db(self._latest_id)
+                self.broker.last_id = max(latest, self.broker.last_id or 0)
+            if self.broker.last_id > after_id:
+                out = await self.run_db(self._load_messages, after_id)
+                if out:
+                    await self.respond(send, 200, out)
+                    return
+            try:
+                message = await asyncio.wait_for(fut, wait)
+                out = [message] if message['id'] > after_id else []
+            except asyncio.TimeoutError:
+                # Also picks up messages written by other processes
+                out = await self.run_db(self._load_messages, after_id)
+        finally:
+            self.broker.unsubscribe(fut)
+        await self.respond(send, 200, out)
+
+    async def send_message(self, scope, receive, send):
+        user_id = self.session_user_id(scope)
+        raw = await self.read_body(receive)
+        if not user_id:
+            await self.respond(send, 403, {'error': 'login required'})
+            return
+        try:
+            data = json.loads(raw or b'{}') or {}
+        except ValueError:
+            data = {}
+        body = str(data.get('message', '')).strip() if isinstance(data, dict) else ''
+        if not body:
+            await self.respond(send, 400, {'error': 'empty'})
+            return
+        message = await self.run_db(self._save_message, user_id, body)
+        self.broker.publish(message)
+        await self.respond(send, 200, {'ok': True, 'id': message['id'], 'timestamp': message['timestamp']})
+
+
+def create_asgi_app(fallback=None, db_workers=4):
+    """
+    Build the async app. Non-chat requests go to ``fallback``, which defaults
+    to the Flask app wrapped with asgiref's WsgiToAsgi.
+    """
+    if fallback is None:
+        if WsgiToAsgi is None:
+            raise RuntimeError("asgiref is required for async mode. Please install it with: pip install asgiref")
+        fallback = WsgiToAsgi(flask_app)
+    with flask_app.app_context():
+        db.create_all()
+    return ChatService(flask_app, fallback=fallback, db_workers=db_workers)
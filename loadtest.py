@@ -0,0 +1,454 @@
+"""
+Synthetic load generator and capacity report for the PLUR PGH web app.
+
+Virtual users replay a realistic mix of quiz takers, forum readers and
+chatters while concurrency ramps up stage by stage. Each stage reports
+throughput, latency percentiles, error rate and SQLite lock waits per route.
+
+By default the app runs in-process through app.test_client() against a
+scratch database. Use --url to drive an already running instance instead
+(lock waits cannot be observed from outside the process).
+
+    python loadtest.py --stages 1,4,16 --duration 10
+    python loadtest.py --url http://127.0.0.1:5000 --json report.json
+"""
+import argparse
+import http.cookiejar
+import itertools
+import json
+import math
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+# Share of virtual users running each scenario
+DEFAULT_MIX = {'quiz': 0.4, 'reader': 0.4, 'chatter': 0.2}
+# Write statements and commits slower than this are counted as SQLite lock waits
+DEFAULT_LOCK_THRESHOLD_MS = 50.0
+
+QUIZ_ZIPS = ['15201', '15203', '15212', '15219', '15222']
+QUIZ_TYPES = ['Bar / Pub', 'Night club', 'Lounge', 'Live music venue', 'Winery/ Brewery']
+QUIZ_PREFS = ['LGBT +', 'Adult Club', 'Activity']
+
+POST_LINK_RE = re.compile(r'href="/post/(\d+)"')
+
+_usernames = itertools.count(1)
+_username_lock = threading.Lock()
+
+
+def next_username():
+    with _username_lock:
+        return f'load{os.getpid()}_{next(_usernames)}'
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class RouteStats:
+    """Samples for one route within one stage. Guarded by the Recorder lock."""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.lock_waits = 0
+        self.lock_wait_ms = 0.0
+
+    def summary(self, elapsed):
+        lat = sorted(self.latencies)
+        n = len(lat)
+        return {
+            'requests': n,
+            'rps': n / elapsed if elapsed else 0.0,
+            'error_rate': self.errors / n if n else 0.0,
+            'p50_ms': percentile(lat, 50),
+            'p95_ms': percentile(lat, 95),
+            'p99_ms': percentile(lat, 99),
+            'max_ms': lat[-1] if lat else 0.0,
+            'lock_waits': self.lock_waits,
+            'lock_wait_ms': self.lock_wait_ms,
+        }
+
+
+class Recorder:
+    """Collects per-route samples; the current route is tracked per thread."""
+
+    def __init__(self):
+        self.routes = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stats(self, route):
+        stats = self.routes.get(route)
+        if stats is None:
+            stats = self.routes[route] = RouteStats()
+        return stats
+
+    @property
+    def current_route(self):
+        return getattr(self._local, 'route', None)
+
+    def set_route(self, route):
+        """Attribute database events on this thread to ``route`` (None to clear)."""
+        self._local.route = route
+
+    def record(self, route, latency_ms, ok):
+        with self._lock:
+            stats = self._stats(route)
+            stats.latencies.append(latency_ms)
+            if not ok:
+                stats.errors += 1
+
+    def record_lock_wait(self, wait_ms):
+        route = self.current_route or '(background)'
+        with self._lock:
+            stats = self._stats(route)
+            stats.lock_waits += 1
+            stats.lock_wait_ms += wait_ms
+
+
+class InProcessTarget:
+    """
+    Drives the Flask app through test clients. SQLAlchemy events time write
+    statements and commits so lock waits can be attributed to routes.
+    Commits matter most: SQLite takes its exclusive lock at COMMIT, which
+    never passes through the cursor events.
+    """
+    observes_locks = True
+
+    def __init__(self, flask_app, db, lock_threshold_ms=DEFAULT_LOCK_THRESHOLD_MS):
+        from sqlalchemy import event
+
+        self.flask_app = flask_app
+        self.recorder = None
+        self.lock_threshold_ms = lock_threshold_ms
+        self._started = threading.local()
+        with flask_app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', self._before_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_execute)
+        event.listen(engine, 'handle_error', self._on_error)
+        # The engine 'commit' event fires just before the DBAPI commit; the
+        # session's after_commit fires once it has returned
+        event.listen(engine, 'begin', self._on_begin)
+        event.listen(engine, 'commit', self._before_commit)
+        event.listen(db.session, 'after_commit', self._after_commit)
+
+    @staticmethod
+    def _is_write(statement):
+        return statement.lstrip()[:6].upper() in ('INSERT', 'UPDATE', 'DELETE')
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self._is_write(statement):
+            self._started.t = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(self._started, 't', None)
+        self._started.t = None
+        self._record(started)
+
+    def _on_begin(self, conn):
+        # Drop a commit start left by a commit made outside the session
+        self._started.commit = None
+
+    def _before_commit(self, conn):
+        self._started.commit = time.perf_counter()
+
+    def _after_commit(self, session):
+        started = getattr(self._started, 'commit', None)
+        self._started.commit = None
+        self._record(started)
+
+    def _record(self, started):
+        if started is None:
+            return
+        wait_ms = (time.perf_counter() - started) * 1000
+        if self.recorder and wait_ms >= self.lock_threshold_ms:
+            self.recorder.record_lock_wait(wait_ms)
+
+    def _on_error(self, context):
+        # Either a write statement or a commit failed
+        started = getattr(self._started, 't', None) or getattr(self._started, 'commit', None)
+        self._started.t = self._started.commit = None
+        if self.recorder and 'database is locked' in str(context.original_exception):
+            wait_ms = (time.perf_counter() - started) * 1000 if started else 0.0
+            self.recorder.record_lock_wait(wait_ms)
+
+    def session(self):
+        client = self.flask_app.test_client()
+
+        def request(method, path, data=None, json_body=None):
+            rv = client.open(path, method=method, data=data, json=json_body)
+            body = rv.get_data()
+            rv.close()
+            return rv.status_code, body
+        return request
+
+
+class HttpTarget:
+    """Drives a running instance over HTTP, one cookie jar per virtual user."""
+    observes_locks = False
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.recorder = None
+
+    class _NoRedirect(urllib.request.HTTPRedirectHandler):
+        def redirect_request(self, req, fp, code, msg, headers, newurl):
+            return None
+
+    def session(self):
+        opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), self._NoRedirect())
+
+        def request(method, path, data=None, json_body=None):
+            headers = {}
+            payload = None
+            if json_body is not None:
+                payload = json.dumps(json_body).encode('utf-8')
+                headers['Content-Type'] = 'application/json'
+            elif data is not None:
+                payload = urllib.parse.urlencode(data, doseq=True).encode('utf-8')
+                headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            req = urllib.request.Request(self.base_url + path, data=payload, headers=headers, method=method)
+            try:
+                with opener.open(req, timeout=self.timeout) as resp:
+                    return resp.status, resp.read()
+            except urllib.error.HTTPError as e:
+                return e.code, e.read()
+        return request
+
+
+class VirtualUser:
+    """One simulated visitor with its own session, replaying a scenario in a loop."""
+
+    def __init__(self, target, scenario, rng):
+        self.target = target
+        self.scenario = scenario
+        self.rng = rng
+        self.request = target.session()
+        self.username = None
+
+    def call(self, method, path, route=None, **kwargs):
+        route = route or f'{method} {path}'
+        recorder = self.target.recorder
+        recorder.set_route(route)
+        started = time.perf_counter()
+        try:
+            status, body = self.request(method, path, **kwargs)
+            ok = status < 400
+        except Exception:
+            status, body, ok = None, b'', False
+        recorder.record(route, (time.perf_counter() - started) * 1000, ok)
+        recorder.set_route(None)
+        return status, body
+
+    def login(self):
+        if self.username is None:
+            self.username = next_username()
+            self.call('POST', '/register', data={'username': self.username, 'password': 'loadtest'})
+        else:
+            self.call('POST', '/login', data={'username': self.username, 'password': 'loadtest'})
+
+    def run_quiz(self):
+        form = {
+            'zip': self.rng.choice(QUIZ_ZIPS),
+            'budget': self.rng.choice(['$', '$$', '$$$']),
+            'types': self.rng.sample(QUIZ_TYPES, self.rng.randint(0, 2)),
+            'prefs': self.rng.sample(QUIZ_PREFS, self.rng.randint(0, 1)),
+        }
+        self.call('GET', '/quiz')
+        self.call('POST', '/quiz', data=form)
+        self.call('GET', '/results')
+        self.call('GET', '/dashboard')
+
+    def run_reader(self, post_ids):
+        self.call('GET', '/posts')
+        if not post_ids:
+            return
+        for _ in range(self.rng.randint(1, 3)):
+            post_id = self.rng.choice(post_ids)
+            self.call('GET', f'/post/{post_id}', route='GET /post/<id>')
+        if self.rng.random() < 0.2:
+            post_id = self.rng.choice(post_ids)
+            self.call('POST', f'/post/{post_id}', route='POST /post/<id>',
+                      data={'body': 'Load test comment'})
+
+    def run_chatter(self):
+        for _ in range(self.rng.randint(2, 5)):
+            self.call('GET', '/chat/messages')
+        if self.rng.random() < 0.3:
+            self.call('POST', '/chat/send', json_body={'message': 'load test hello'})
+
+    def run(self, stop, post_ids):
+        self.login()
+        while not stop.is_set():
+            if self.scenario == 'quiz':
+                self.run_quiz()
+            elif self.scenario == 'reader':
+                self.run_reader(post_ids)
+            else:
+                self.run_chatter()
+            # Occasionally log back in, like a returning visitor
+            if self.rng.random() < 0.05:
+                self.login()
+
+
+def pick_scenarios(n, mix, rng):
+    """Spread ``n`` virtual users across scenarios in proportion to ``mix``."""
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    return [rng.choices(names, weights)[0] for _ in range(n)]
+
+
+def run_stage(target, concurrency, duration, mix, post_ids, seed=0):
+    recorder = Recorder()
+    target.recorder = recorder
+    stop = threading.Event()
+    rng = random.Random(seed)
+    users = [VirtualUser(target, scenario, random.Random(rng.random()))
+             for scenario in pick_scenarios(concurrency, mix, rng)]
+    threads = [threading.Thread(target=u.run, args=(stop, post_ids), daemon=True) for u in users]
+
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    routes = {route: stats.summary(elapsed) for route, stats in sorted(recorder.routes.items())
+              if stats.latencies or stats.lock_waits}
+    total = sum(r['requests'] for r in routes.values())
+    errors = sum(stats.errors for stats in recorder.routes.values())
+    return {
+        'concurrency': concurrency,
+        'elapsed_s': elapsed,
+        'requests': total,
+        'rps': total / elapsed if elapsed else 0.0,
+        'error_rate': errors / total if total else 0.0,
+        'lock_waits': sum(r['lock_waits'] for r in routes.values()),
+        'routes': routes,
+    }
+
+
+def run_load(target, stages=(1, 2, 4, 8), duration=10.0, mix=None, post_ids=(1,), seed=0):
+    """Ramp through ``stages`` (virtual user counts) and return the capacity report."""
+    mix = mix or DEFAULT_MIX
+    report = {'mix': mix, 'duration_s': duration, 'observes_locks': target.observes_locks, 'stages': []}
+    for i, concurrency in enumerate(stages):
+        report['stages'].append(run_stage(target, concurrency, duration, mix, list(post_ids), seed + i))
+    return report
+
+
+def seed_posts(flask_app, db, count=20):
+    """Create a forum author and a few posts so readers have something to browse."""
+    from app import User, Post
+    with flask_app.app_context():
+        author = User.query.filter_by(username='loadtest_author').first()
+        if author is None:
+            author = User(username='loadtest_author')
+            author.set_password('loadtest')
+            db.session.add(author)
+            db.session.commit()
+        for i in range(count - Post.query.count()):
+            db.session.add(Post(user_id=author.id, title=f'Load test post {i}', body='Seeded for load testing.'))
+        db.session.commit()
+        return [p.id for p in Post.query.with_entities(Post.id).all()]
+
+
+def discover_post_ids(target):
+    """Post ids linked from /posts on the target, so readers never request missing posts."""
+    status, body = target.session()('GET', '/posts')
+    if status != 200:
+        return []
+    return sorted({int(i) for i in POST_LINK_RE.findall(body.decode('utf-8', 'replace'))})
+
+
+def seed_posts_http(target, count=20):
+    """Create posts through the target's own routes, as a registered load test author."""
+    request = target.session()
+    request('POST', '/register', data={'username': next_username(), 'password': 'loadtest'})
+    for i in range(count):
+        request('POST', '/post/new', data={'title': f'Load test post {i}', 'body': 'Seeded for load testing.'})
+    return discover_post_ids(target)
+
+
+def format_report(report):
+    lines = []
+    for stage in report['stages']:
+        lines.append('')
+        lines.append(f"== {stage['concurrency']} virtual users: {stage['requests']} requests in "
+                     f"{stage['elapsed_s']:.1f}s, {stage['rps']:.1f} req/s, "
+                     f"{stage['error_rate'] * 100:.2f}% errors ==")
+        lines.append(f"{'route':<22}{'reqs':>7}{'req/s':>8}{'err%':>7}{'p50ms':>8}{'p95ms':>8}"
+                     f"{'p99ms':>8}{'maxms':>8}{'locks':>7}{'lockms':>9}")
+        for route, r in stage['routes'].items():
+            locks = f"{r['lock_waits']:>7}{r['lock_wait_ms']:>9.0f}" if report['observes_locks'] else f"{'-':>7}{'-':>9}"
+            lines.append(f"{route:<22}{r['requests']:>7}{r['rps']:>8.1f}{r['error_rate'] * 100:>7.2f}"
+                         f"{r['p50_ms']:>8.1f}{r['p95_ms']:>8.1f}{r['p99_ms']:>8.1f}{r['max_ms']:>8.1f}{locks}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test PLUR PGH and print a capacity report.')
+    parser.add_argument('--url', help='drive a running instance (e.g. http://127.0.0.1:5000) instead of test_client()')
+    parser.add_argument('--db', help='database URI for in-process runs (default: a scratch SQLite file)')
+    parser.add_argument('--stages', default='1,2,4,8', help='comma-separated virtual user counts to ramp through')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per stage')
+    parser.add_argument('--mix', default=None, help='scenario weights, e.g. quiz=0.4,reader=0.4,chatter=0.2')
+    parser.add_argument('--lock-threshold-ms', type=float, default=DEFAULT_LOCK_THRESHOLD_MS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='also write the full report to this file')
+    args = parser.parse_args(argv)
+
+    stages = [int(s) for s in args.stages.split(',') if s.strip()]
+    mix = DEFAULT_MIX
+    if args.mix:
+        mix = {k: float(v) for k, v in (part.split('=') for part in args.mix.split(','))}
+        unknown = set(mix) - set(DEFAULT_MIX)
+        if unknown:
+            parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    if args.url:
+        target = HttpTarget(args.url)
+        post_ids = discover_post_ids(target)
+        if not post_ids and mix.get('reader'):
+            print('No posts found on the target; seeding some over HTTP.')
+            post_ids = seed_posts_http(target)
+        if not post_ids and mix.get('reader'):
+            print('Still no posts to read; leaving the reader scenario out of this run.')
+            mix = {k: v for k, v in mix.items() if k != 'reader'}
+            if not any(mix.values()):
+                parser.error('no scenarios left to run')
+    else:
+        # Must be set before app is imported so the real app.db is left alone
+        os.environ['PLURPGH_DATABASE_URI'] = args.db or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'loadtest.db')
+        from app import app, db
+        with app.app_context():
+            db.create_all()
+        post_ids = seed_posts(app, db)
+        target = InProcessTarget(app, db, lock_threshold_ms=args.lock_threshold_ms)
+
+    report = run_load(target, stages, args.duration, mix, post_ids, args.seed)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
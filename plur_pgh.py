@@ -1,8 +1,15 @@
 import csv
+import queue
 import sys
+import threading
 import tkinter as tk
 from tkinter import messagebox, ttk
 
+# How many type checkboxes to create per Tk event-loop tick
+WIDGET_BATCH_SIZE = 25
+# How often (ms) the GUI polls background work
+POLL_INTERVAL_MS = 50
+
 def load_data(filepath='plurpgh.csv'):
     """
     Loads data using the standard csv library.
@@ -18,8 +25,41 @@ def load_data(filepath='plurpgh.csv'):
     except FileNotFoundError:
         return []
 
-def get_user_input_gui(unique_types):
-    """Handles the user interface using Tkinter GUI."""
+class CatalogLoader(threading.Thread):
+    """
+    Loads and indexes the venue catalog on a background thread so windows
+    can be shown before the CSV has been read. Never touches Tk widgets;
+    the GUI polls done() from the main thread.
+    """
+
+    def __init__(self, filepath='plurpgh.csv'):
+        super().__init__(daemon=True)
+        self.filepath = filepath
+        self.data = []
+        self.unique_types = []
+        self._done = threading.Event()
+
+    def run(self):
+        try:
+            self.data = load_data(self.filepath)
+            # Extract unique types dynamically
+            self.unique_types = sorted(set(row.get('type', '').strip() for row in self.data if row.get('type')))
+        finally:
+            self._done.set()
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+def get_user_input_gui(catalog):
+    """
+    Handles the user interface using Tkinter GUI.
+    The window appears immediately; type choices are filled in as the
+    catalog finishes loading and scoring runs on a worker thread.
+    Returns the answers plus the top venues, or None if the window was closed.
+    """
     root = tk.Tk()
     root.title("PITTSBURGH VENUE FINDER QUIZ")
     root.geometry("500x600")
@@ -38,15 +78,13 @@ def get_user_input_gui(unique_types):
     tk.Radiobutton(budget_frame, text="$$ (Moderate)", variable=budget_var, value="$$").pack(anchor=tk.W)
     tk.Radiobutton(budget_frame, text="$$$ (High-end)", variable=budget_var, value="$$$").pack(anchor=tk.W)
 
-    # Venue Type
+    # Venue Type (populated once the catalog has loaded)
     tk.Label(root, text="3. What type of venue matches your vibe? (Select multiple)").pack(pady=5)
     type_vars = []
     type_frame = tk.Frame(root)
     type_frame.pack(pady=5)
-    for dtype in unique_types:
-        var = tk.BooleanVar()
-        tk.Checkbutton(type_frame, text=dtype, variable=var).pack(anchor=tk.W)
-        type_vars.append((dtype, var))
+    loading_label = tk.Label(type_frame, text="Loading venues...", fg="gray")
+    loading_label.pack(anchor=tk.W)
 
     # Preferences
     tk.Label(root, text="4. Any specific preferences? (Select multiple)").pack(pady=5)
@@ -61,6 +99,60 @@ def get_user_input_gui(unique_types):
 
     # Result variables
     result = {}
+    progress_queue = queue.Queue()
+
+    def add_type_widgets(start=0):
+        """Create the type checkboxes a batch at a time so the UI stays responsive."""
+        batch = catalog.unique_types[start:start + WIDGET_BATCH_SIZE]
+        for dtype in batch:
+            var = tk.BooleanVar()
+            tk.Checkbutton(type_frame, text=dtype, variable=var).pack(anchor=tk.W)
+            type_vars.append((dtype, var))
+        if start + WIDGET_BATCH_SIZE < len(catalog.unique_types):
+            root.after(1, add_type_widgets, start + WIDGET_BATCH_SIZE)
+
+    def wait_for_catalog():
+        if not catalog.done():
+            root.after(POLL_INTERVAL_MS, wait_for_catalog)
+            return
+        loading_label.destroy()
+        if not catalog.data:
+            messagebox.showerror("Error", "CSV file not found. Please ensure 'plurpgh.csv' is in the same folder.")
+            root.quit()
+            return
+        find_button.config(state=tk.NORMAL)
+        add_type_widgets()
+
+    def score_worker(answers):
+        # Always finish with a list or an exception so wait_for_scores stops polling
+        try:
+            venues = calculate_scores(catalog.data, answers['zip'], answers['budget'],
+                                      answers['types'], answers['prefs'],
+                                      progress=lambda done, total: progress_queue.put((done, total)))
+        except Exception as e:
+            progress_queue.put(e)
+        else:
+            progress_queue.put(venues)
+
+    def wait_for_scores():
+        try:
+            while True:
+                item = progress_queue.get_nowait()
+                if isinstance(item, tuple):
+                    done, total = item
+                    progress_bar.config(maximum=max(total, 1), value=done)
+                elif isinstance(item, Exception):
+                    progress_bar.pack_forget()
+                    find_button.config(state=tk.NORMAL, text="Find Venues")
+                    messagebox.showerror("Error", f"Could not score venues: {item}")
+                    return
+                else:
+                    result['venues'] = item
+                    root.quit()
+                    return
+        except queue.Empty:
+            pass
+        root.after(POLL_INTERVAL_MS, wait_for_scores)
 
     def submit():
         user_zip = zip_entry.get().strip()
@@ -73,16 +165,27 @@ def get_user_input_gui(unique_types):
             'types': selected_types,
             'prefs': selected_prefs
         })
-        root.quit()
+        find_button.config(state=tk.DISABLED, text="Scoring venues...")
+        progress_bar.pack(pady=5)
+        threading.Thread(target=score_worker, args=(dict(result),), daemon=True).start()
+        wait_for_scores()
+
+    find_button = tk.Button(root, text="Find Venues", command=submit, state=tk.DISABLED)
+    find_button.pack(pady=20)
+    progress_bar = ttk.Progressbar(root, orient=tk.HORIZONTAL, length=300, mode='determinate')
 
-    tk.Button(root, text="Find Venues", command=submit).pack(pady=20)
+    root.protocol("WM_DELETE_WINDOW", root.quit)
+    root.after(0, wait_for_catalog)
     root.mainloop()
     root.destroy()
-    return result['zip'], result['budget'], result['types'], result['prefs']
+    if 'venues' not in result:
+        return None
+    return result
 
-def calculate_scores(data, user_zip, user_budget, user_types, user_prefs):
+def calculate_scores(data, user_zip, user_budget, user_types, user_prefs, progress=None, progress_every=500):
     """
     Scores venues based on user input using standard Python lists/dicts.
+    If given, progress(done, total) is called every progress_every rows.
     """
     
     # Budget Mapping
@@ -90,8 +193,11 @@ def calculate_scores(data, user_zip, user_budget, user_types, user_prefs):
     user_rank = price_rank.get(user_budget, 1)
     
     scored_results = []
+    total = len(data)
     
-    for row in data:
+    for i, row in enumerate(data, 1):
+        if progress and i % progress_every == 0:
+            progress(i, total)
         score = 0
         
         # 1. Zip Code Match (+50 points)
@@ -132,6 +238,9 @@ def calculate_scores(data, user_zip, user_budget, user_types, user_prefs):
             row['match_score'] = score
             scored_results.append(row)
             
+    if progress:
+        progress(total, total)
+
     # Sort by score descending (highest first)
     scored_results.sort(key=lambda x: x['match_score'], reverse=True)
     
@@ -181,24 +290,19 @@ def display_results_gui(top_venues):
     result_window.mainloop()
     result_window.destroy()
 
-def main():
-    # Load Data
-    data = load_data()
-    if not data:
-        messagebox.showerror("Error", "CSV file not found. Please ensure 'plurpgh.csv' is in the same folder.")
-        return
+def main(catalog=None):
+    # Load Data in the background (the launcher may have started this already)
+    if catalog is None:
+        catalog = CatalogLoader()
+        catalog.start()
 
-    # Extract unique types dynamically
-    unique_types = sorted(list(set(row.get('type', '').strip() for row in data if row.get('type'))))
-    
-    # Run GUI Interface
-    u_zip, u_budget, u_types, u_prefs = get_user_input_gui(unique_types)
-    
-    # Calculate Results
-    top_venues = calculate_scores(data, u_zip, u_budget, u_types, u_prefs)
+    # Run GUI Interface (scoring happens off the UI thread)
+    answers = get_user_input_gui(catalog)
+    if answers is None:
+        return
     
     # Display Results in GUI
-    display_results_gui(top_venues)
+    display_results_gui(answers['venues'])
 
 if __name__ == "__main__":
     main()
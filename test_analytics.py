@@ -0,0 +1,53 @@
+from app import app, db, AnalyticsCounter, Result, rebuild_analytics_command, record_result_analytics
+
+def run_tests():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        client = app.test_client()
+        client.post('/register', data={'username': 'counter', 'password': 'p'})
+
+        # two quizzes, one recorded result each
+        client.post('/quiz', data={'zip': '15201', 'budget': '$', 'types': ['Bar / Pub'], 'prefs': ['LGBT +']})
+        client.get('/results')
+        client.post('/quiz', data={'zip': '15201', 'budget': '$$', 'types': ['Bar / Pub', 'Lounge'], 'prefs': []})
+        client.get('/results')
+        assert Result.query.count() == 2
+
+        report = client.get('/analytics').get_json()
+        assert report['queries'] == 2
+        assert report['zip'] == [{'key': '15201', 'count': 2}]
+        assert {'key': 'Bar / Pub', 'count': 2} in report['type']
+        assert {'key': 'Lounge', 'count': 1} in report['type']
+        assert {'key': '$', 'count': 1} in report['budget']
+        assert report['pref'] == [{'key': 'LGBT +', 'count': 1}]
+        assert sum(v['count'] for v in report['venue']) == 6
+        assert all('|' in v['key'] and v['title'] for v in report['venue'])
+        assert len(report['daily']) == 1 and report['daily'][0]['queries'] == 2
+
+        # counters are one row per (kind, key, day), not one per result
+        assert AnalyticsCounter.query.filter_by(kind='zip').count() == 1
+
+        assert len(client.get('/analytics?limit=1').get_json()['venue']) == 1
+        assert len(client.get('/analytics?limit=-1').get_json()['venue']) == 1
+        assert client.get('/analytics?days=1').get_json()['queries'] == 2
+        for bad in ('0', '-5', 'abc'):
+            assert client.get('/analytics?days=' + bad).status_code == 400
+
+        # rebuilding from stored results gives the same report
+        app.test_cli_runner().invoke(rebuild_analytics_command)
+        assert client.get('/analytics').get_json() == report
+
+        # venues sharing a title in different zip codes are counted separately
+        record_result_analytics('15201', '$', [], [], [
+            {'title': 'Test Venue', 'Zip Code': '15201'},
+            {'title': 'Test  Venue', 'Zip Code': '15222'},
+        ])
+        db.session.commit()
+        venues = client.get('/analytics?limit=100').get_json()['venue']
+        assert {'key': 'test venue|15201', 'title': 'Test Venue', 'count': 1} in venues
+        assert {'key': 'test venue|15222', 'title': 'Test  Venue', 'count': 1} in venues
+        print('analytics queries:', report['queries'])
+
+if __name__ == '__main__':
+    run_tests()
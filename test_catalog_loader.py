@@ -0,0 +1,30 @@
+from plur_pgh import CatalogLoader, calculate_scores
+
+def run_tests():
+    # catalog loads on a background thread
+    catalog = CatalogLoader()
+    catalog.start()
+    assert catalog.wait(timeout=10)
+    assert catalog.done()
+    assert len(catalog.data) > 0
+    assert catalog.unique_types == sorted(set(row['type'].strip() for row in catalog.data if row.get('type')))
+
+    # missing file finishes with an empty catalog instead of hanging
+    missing = CatalogLoader('does_not_exist.csv')
+    missing.start()
+    assert missing.wait(timeout=10)
+    assert missing.data == [] and missing.unique_types == []
+
+    # scoring reports progress and always finishes at total
+    updates = []
+    top = calculate_scores(catalog.data, '15201', '$$', ['Bar / Pub'], [],
+                           progress=lambda done, total: updates.append((done, total)),
+                           progress_every=50)
+    total = len(catalog.data)
+    assert len(top) == 3
+    assert updates[-1] == (total, total)
+    assert [done for done, _ in updates[:-1]] == list(range(50, total + 1, 50))
+    print('catalog venues:', total, 'types:', len(catalog.unique_types))
+
+if __name__ == '__main__':
+    run_tests()
@@ -0,0 +1,87 @@
+import asyncio
+import json
+from datetime import timedelta
+
+from app import app, db, ChatMessage
+from chat_asgi import create_asgi_app
+
+async def fallback(scope, receive, send):
+    await send({'type': 'http.response.start', 'status': 299, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b'flask'})
+
+async def call(asgi, method, path, query=b'', body=b'', cookie=None):
+    headers = [(b'cookie', cookie.encode())] if cookie else []
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query, 'headers': headers}
+    sent = []
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+    async def send(event):
+        sent.append(event)
+    await asgi(scope, receive, send)
+    status = sent[0]['status']
+    data = b''.join(e.get('body', b'') for e in sent[1:])
+    return status, json.loads(data) if status != 299 else data
+
+async def scenario(cookie):
+    asgi = create_asgi_app(fallback=fallback)
+
+    # same shape as the synchronous route
+    status, msgs = await call(asgi, 'GET', '/chat/messages')
+    assert status == 200 and len(msgs) == 1 and msgs[0]['user'] == 'chatter'
+    last_id = msgs[0]['id']
+
+    # send requires a session
+    status, _ = await call(asgi, 'POST', '/chat/send', body=b'{"message":"x"}')
+    assert status == 403
+    status, _ = await call(asgi, 'POST', '/chat/send', body=b'{"message":"  "}', cookie=cookie)
+    assert status == 400
+
+    # many idle long-poll subscribers are all woken by one send
+    query = f'after={last_id}&wait=10'.encode()
+    waiters = [asyncio.ensure_future(call(asgi, 'GET', '/chat/messages', query=query)) for _ in range(500)]
+    while len(asgi.broker) < 500:
+        await asyncio.sleep(0.01)
+    status, sent = await call(asgi, 'POST', '/chat/send', body=b'{"message":"hello async"}', cookie=cookie)
+    assert status == 200 and sent['ok']
+    results = await asyncio.gather(*waiters)
+    assert all(s == 200 and [m['body'] for m in r] == ['hello async'] for s, r in results)
+    assert len(asgi.broker) == 0
+
+    # a poll that is behind returns immediately from the database
+    status, msgs = await call(asgi, 'GET', '/chat/messages', query=query)
+    assert [m['id'] for m in msgs] == [sent['id']]
+
+    # nothing new: times out with an empty list
+    status, msgs = await call(asgi, 'GET', '/chat/messages', query=f'after={sent["id"]}&wait=0.05'.encode())
+    assert status == 200 and msgs == []
+
+    # cookies older than permanent_session_lifetime are rejected, as in Flask
+    lifetime = app.permanent_session_lifetime
+    app.permanent_session_lifetime = timedelta(seconds=0)
+    try:
+        await asyncio.sleep(1.1)
+        status, _ = await call(asgi, 'POST', '/chat/send', body=b'{"message":"late"}', cookie=cookie)
+        assert status == 403
+    finally:
+        app.permanent_session_lifetime = lifetime
+
+    # everything else is served by the Flask app
+    status, body = await call(asgi, 'GET', '/posts')
+    assert status == 299 and body == b'flask'
+
+def run_tests():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        client = app.test_client()
+        client.post('/register', data={'username': 'chatter', 'password': 'p'})
+        client.post('/chat/send', json={'message': 'sync hello'})
+        cookie = 'session=' + client.get_cookie('session').value
+
+    asyncio.run(scenario(cookie))
+
+    with app.app_context():
+        print('chat messages:', ChatMessage.query.count())
+
+if __name__ == '__main__':
+    run_tests()
@@ -0,0 +1,46 @@
+from app import app, db
+from loadtest import InProcessTarget, run_load, seed_posts, seed_posts_http, discover_post_ids, format_report, percentile
+
+def run_tests():
+    assert percentile([1, 2, 3, 4], 50) == 2
+    assert percentile([1, 2, 3, 4], 99) == 4
+    assert percentile([], 95) == 0.0
+    ten = list(range(1, 11))
+    assert percentile(ten, 50) == 5
+    assert percentile(ten, 95) == 10
+    hundred = list(range(1, 101))
+    assert percentile(hundred, 50) == 50
+    assert percentile(hundred, 95) == 95
+    assert percentile(hundred, 99) == 99
+    assert percentile(list(range(1, 21)), 95) == 19
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    # lock threshold 0 counts every write, so attribution can be checked
+    target = InProcessTarget(app, db, lock_threshold_ms=0)
+
+    # --url mode discovers real post ids, seeding over HTTP when there are none
+    assert discover_post_ids(target) == []
+    assert len(seed_posts_http(target, count=2)) == 2
+    post_ids = seed_posts(app, db, count=3)
+    assert len(post_ids) == 3
+    assert discover_post_ids(target) == sorted(post_ids)
+    report = run_load(target, stages=(1, 3), duration=1.0,
+                      mix={'quiz': 1, 'reader': 1, 'chatter': 1}, post_ids=post_ids, seed=3)
+
+    assert [s['concurrency'] for s in report['stages']] == [1, 3]
+    last = report['stages'][-1]
+    assert last['requests'] > 0 and last['error_rate'] == 0.0
+    assert 'POST /register' in last['routes']
+    # each registration is one INSERT plus one COMMIT
+    register = last['routes']['POST /register']
+    assert register['lock_waits'] >= 2 * register['requests']
+    for r in last['routes'].values():
+        assert r['p50_ms'] <= r['p95_ms'] <= r['p99_ms'] <= r['max_ms']
+    routes = set().union(*(s['routes'] for s in report['stages']))
+    assert '(background)' not in routes
+    print(format_report(report))
+
+if __name__ == '__main__':
+    run_tests()
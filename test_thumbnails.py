@@ -0,0 +1,142 @@
+import os
+import tempfile
+import threading
+
+from app import app, db, Venue, get_thumbnail_cache, load_data, start_thumbnail_warmer, thumbnail_allowed
+from thumbnails import ImageTooLarge, ThumbnailCache, UnsupportedContentType, sized_url, urllib_fetcher
+
+SRC = 'https://lh3.googleusercontent.com/gps-cs-s/abc=s1024-v1'
+
+fetched = []
+
+def stub_fetcher(url):
+    fetched.append(url)
+    return b'x' * 100, 'image/jpeg'
+
+def html_fetcher(url):
+    return b'<script>alert(1)</script>', 'text/html'
+
+def run_tests():
+    # googleusercontent URLs are resized upstream
+    assert sized_url(SRC, 400) == 'https://lh3.googleusercontent.com/gps-cs-s/abc=s400-v1'
+    assert sized_url('https://example.com/a.jpg', 400) == 'https://example.com/a.jpg'
+
+    # size-bounded LRU: least recently used variant is evicted
+    cache_dir = tempfile.mkdtemp()
+    cache = ThumbnailCache(cache_dir, max_bytes=250, fetcher=stub_fetcher)
+    cache.get('https://example.com/a.jpg', 200)
+    cache.get('https://example.com/b.jpg', 200)
+    cache.get('https://example.com/a.jpg', 200)  # hit, a becomes most recent
+    cache.get('https://example.com/c.jpg', 200)
+    assert len(fetched) == 3
+    assert ThumbnailCache.make_key('https://example.com/b.jpg', 200) not in cache
+    assert ThumbnailCache.make_key('https://example.com/a.jpg', 200) in cache
+    assert cache.total_bytes == 200 and len(os.listdir(cache_dir)) == 2
+
+    # index survives a restart, and hits keep the stored content type
+    reopened = ThumbnailCache(cache_dir, max_bytes=250, fetcher=stub_fetcher)
+    assert len(reopened) == 2
+    assert reopened.get('https://example.com/a.jpg', 200) == (b'x' * 100, 'image/jpeg')
+    assert len(fetched) == 3
+
+    # a full cache under concurrent gets always returns the bytes, never a vanished file
+    busy = ThumbnailCache(tempfile.mkdtemp(), max_bytes=150, fetcher=lambda url: (b'y' * 100, 'image/png'))
+    errors = []
+    def hammer(n):
+        for i in range(50):
+            try:
+                assert busy.get(f'https://example.com/{(n + i) % 7}.png', 200) == (b'y' * 100, 'image/png')
+            except Exception as e:
+                errors.append(e)
+    threads = [threading.Thread(target=hammer, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+
+    # non-image responses are rejected and never written to disk
+    html_cache = ThumbnailCache(tempfile.mkdtemp(), fetcher=html_fetcher)
+    try:
+        html_cache.get('https://example.com/page.html', 200)
+        assert False, 'expected UnsupportedContentType'
+    except UnsupportedContentType:
+        pass
+    assert len(html_cache) == 0 and os.listdir(html_cache.cache_dir) == []
+
+    # oversized images are rejected by the fetcher and by the cache
+    image_path = os.path.join(tempfile.mkdtemp(), 'big.png')
+    with open(image_path, 'wb') as f:
+        f.write(b'z' * 200)
+    assert urllib_fetcher('file://' + image_path, max_bytes=200) == (b'z' * 200, 'image/png')
+    try:
+        urllib_fetcher('file://' + image_path, max_bytes=199)
+        assert False, 'expected ImageTooLarge'
+    except ImageTooLarge:
+        pass
+    small_cache = ThumbnailCache(tempfile.mkdtemp(), fetcher=stub_fetcher, max_image_bytes=50)
+    try:
+        small_cache.get('https://example.com/big.jpg', 200)
+        assert False, 'expected ImageTooLarge'
+    except ImageTooLarge:
+        pass
+    assert len(small_cache) == 0
+
+    # endpoint only serves catalog thumbnails, looked up by venue key
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add_all([
+            Venue(key=Venue.make_key('Pic Bar', '15201'), title='Pic Bar', zip_code='15201', thumbnail=SRC),
+            Venue(key=Venue.make_key('Offsite', '15201'), title='Offsite', zip_code='15201',
+                  thumbnail='http://evil.example/x.png'),
+            Venue(key=Venue.make_key('Sandbox', '15201'), title='Sandbox', zip_code='15201',
+                  thumbnail='https://sites.googleusercontent.com/x.html'),
+        ])
+        db.session.commit()
+    pic_bar = Venue.make_key('Pic Bar', '15201')
+
+    # endpoint fetches once and serves with long-lived cache headers
+    del fetched[:]
+    app.config['THUMBNAIL_CACHE_DIR'] = tempfile.mkdtemp()
+    app.config['THUMBNAIL_FETCHER'] = stub_fetcher
+    app.extensions.pop('thumbnail_cache', None)
+    client = app.test_client()
+    for _ in range(2):
+        rv = client.get('/thumbnail', query_string={'venue': pic_bar, 'size': 400})
+        assert rv.status_code == 200
+        assert rv.mimetype == 'image/jpeg'
+        assert 'max-age=31536000' in rv.headers['Cache-Control']
+        assert rv.headers['X-Content-Type-Options'] == 'nosniff'
+        rv.close()
+    assert fetched == ['https://lh3.googleusercontent.com/gps-cs-s/abc=s400-v1']
+
+    assert client.get('/thumbnail', query_string={'venue': pic_bar, 'size': 800}).status_code == 400
+    assert client.get('/thumbnail', query_string={'venue': Venue.make_key('Offsite', '15201')}).status_code == 403
+    # arbitrary URLs are not proxied
+    assert client.get('/thumbnail', query_string={'src': SRC}).status_code == 404
+    assert client.get('/thumbnail', query_string={'venue': 'nowhere|00000'}).status_code == 404
+    assert len(fetched) == 1
+
+    # HTML from the sandbox domain is a 502, not a cached page on our origin
+    app.config['THUMBNAIL_FETCHER'] = html_fetcher
+    app.extensions.pop('thumbnail_cache', None)
+    rv = client.get('/thumbnail', query_string={'venue': Venue.make_key('Sandbox', '15201'), 'size': 400})
+    assert rv.status_code == 502
+    assert ThumbnailCache.make_key('https://sites.googleusercontent.com/x.html', 400) not in get_thumbnail_cache()
+    app.config['THUMBNAIL_CACHE_DIR'] = tempfile.mkdtemp()
+    app.config['THUMBNAIL_FETCHER'] = stub_fetcher
+    app.extensions.pop('thumbnail_cache', None)
+
+    # warming fetches each catalog thumbnail once per served size (CSV fallback here)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        start_thumbnail_warmer().join(timeout=30)
+        cache = get_thumbnail_cache()
+        urls = {row.get('thumbnail') for row in load_data() if thumbnail_allowed(row.get('thumbnail'))}
+        assert len(cache) == len(urls) * len(app.config['THUMBNAIL_SIZES'])
+        print('warmed thumbnails:', len(cache))
+
+if __name__ == '__main__':
+    run_tests()
@@ -0,0 +1,73 @@
+import csv
+import os
+import tempfile
+
+# Use a scratch database so the fixture venues never end up in app.db
+os.environ['PLURPGH_DATABASE_URI'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test_venue_store.db')
+
+from app import app, db, Venue, import_venues, load_venues, top_venues, load_venue_types, has_venues
+
+def write_csv(path, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['title', 'Zip Code', 'latitude', 'longitude', 'type', 'LGBT +', 'price'])
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+
+def run_tests():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        # empty table falls back to the CSV
+        assert len(load_venues()) > 0
+
+        tmpdir = tempfile.mkdtemp()
+        path = os.path.join(tmpdir, 'venues.csv')
+        write_csv(path, [
+            {'title': 'Cheap Bar', 'Zip Code': '15201', 'latitude': '40.1', 'longitude': '-79.9', 'type': 'Bar / Pub', 'price': '$'},
+            {'title': 'Fancy Lounge', 'Zip Code': '15222', 'latitude': '', 'longitude': '', 'type': 'Lounge', 'price': '$$$'},
+            {'title': 'cheap  bar', 'Zip Code': '15201', 'latitude': '40.2', 'longitude': '-79.8', 'type': 'Bar / Pub', 'price': '$'},
+            {'title': 'Mystery Spot', 'Zip Code': '15203', 'latitude': '40.3', 'longitude': '-79.7', 'type': 'Night club', 'price': ''},
+        ])
+
+        # small chunks: duplicates across chunks are upserted, not added
+        total = import_venues(path, chunk_size=2)
+        assert total == 4
+        assert Venue.query.count() == 3
+        cheap = Venue.query.filter_by(zip_code='15201').one()
+        assert cheap.latitude == 40.2
+
+        # re-import is idempotent
+        import_venues(path)
+        assert Venue.query.count() == 3
+
+        # scoring, budget filter and top-3 are pushed down to SQL
+        top = top_venues('15201', '$', ['Night club'], [])
+        assert [row['title'] for row in top] == ['cheap  bar', 'Mystery Spot']
+        assert [row['match_score'] for row in top] == [35, 30]
+        top = top_venues('15222', '$$$', ['Lounge'], [])
+        assert [row['title'] for row in top][0] == 'Fancy Lounge'
+        assert len(top) == 3
+        assert len(load_venues()) == 3
+        assert [row['title'] for row in load_venues(with_coords=True)] == ['cheap  bar', 'Mystery Spot']
+        assert load_venue_types() == ['Bar / Pub', 'Lounge', 'Night club']
+
+        # routes read from the venue table
+        client = app.test_client()
+        client.post('/quiz', data={'zip': '15201', 'budget': '$'})
+        rv = client.get('/results')
+        assert rv.status_code == 200
+        assert b'cheap  bar' in rv.data
+        assert b'Fancy Lounge' not in rv.data
+        print('venues stored:', Venue.query.count())
+
+        # a database without the venue table falls back to the CSV
+        Venue.__table__.drop(db.engine)
+        assert not has_venues()
+        rv = client.get('/results')
+        assert rv.status_code == 200
+        db.create_all()
+
+if __name__ == '__main__':
+    run_tests()
@@ -0,0 +1,223 @@
+import hashlib
+import os
+import re
+import threading
+import urllib.request
+from collections import OrderedDict
+from io import BytesIO
+from urllib.parse import urlparse
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# googleusercontent image URLs carry their size as "=s1024" / "=w400-h300"
+GOOGLE_SIZE_RE = re.compile(r'=(?:s\d+|w\d+-h\d+)([^/=]*)$')
+
+# Only these are cached and served; anything else (HTML, SVG, ...) could run
+# script on our origin. Maps content type -> cache file extension.
+IMAGE_TYPES = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/webp': '.webp',
+    'image/gif': '.gif',
+}
+EXTENSION_TYPES = {ext: content_type for content_type, ext in IMAGE_TYPES.items()}
+# Largest upstream image we download; catalog originals are well under this
+MAX_IMAGE_BYTES = 5 * 1024 * 1024
+
+
+class RejectedImage(ValueError):
+    """The upstream response must not be cached or served."""
+
+
+class UnsupportedContentType(RejectedImage):
+    """The upstream response is not one of IMAGE_TYPES."""
+
+
+class ImageTooLarge(RejectedImage):
+    """The upstream image is bigger than the allowed number of bytes."""
+
+
+def check_content_type(content_type):
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    if content_type not in IMAGE_TYPES:
+        raise UnsupportedContentType(content_type or 'missing content type')
+    return content_type
+
+
+def urllib_fetcher(url, timeout=10, max_bytes=MAX_IMAGE_BYTES):
+    """Default fetcher: download ``url`` and return (bytes, content_type)."""
+    req = urllib.request.Request(url, headers={'User-Agent': 'plur-pgh-thumbnails'})
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        # Reject before reading the body
+        content_type = check_content_type(resp.headers.get_content_type())
+        length = resp.headers.get('Content-Length', '')
+        if length.isdigit() and int(length) > max_bytes:
+            raise ImageTooLarge(f'{length} bytes')
+        # Never buffer more than the cap, whatever Content-Length claimed
+        data = resp.read(max_bytes + 1)
+        if len(data) > max_bytes:
+            raise ImageTooLarge(f'more than {max_bytes} bytes')
+        return data, content_type
+
+
+def sized_url(url, size):
+    """Ask googleusercontent for a pre-resized variant; other URLs are unchanged."""
+    host = urlparse(url).hostname or ''
+    if host.endswith('googleusercontent.com') and GOOGLE_SIZE_RE.search(url):
+        return GOOGLE_SIZE_RE.sub(lambda m: f'=s{size}' + m.group(1), url)
+    return url
+
+
+def resize_image(data, size):
+    """Shrink image bytes to fit in size x size. Needs Pillow; otherwise a no-op."""
+    if Image is None:
+        return data
+    try:
+        img = Image.open(BytesIO(data))
+        if max(img.size) <= size:
+            return data
+        fmt = img.format or 'PNG'
+        img.thumbnail((size, size))
+        out = BytesIO()
+        img.save(out, format=fmt)
+        return out.getvalue()
+    except Exception:
+        return data
+
+
+class ThumbnailCache:
+    """
+    On-disk LRU cache of resized images, bounded to ``max_bytes``.
+    Each (url, size) variant is fetched once through ``fetcher`` and then
+    served from ``cache_dir``; fetched images over ``max_image_bytes`` are
+    rejected. Safe to use from several threads.
+    """
+
+    def __init__(self, cache_dir, max_bytes=100 * 1024 * 1024, fetcher=urllib_fetcher,
+                 max_image_bytes=MAX_IMAGE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.fetcher = fetcher
+        self.max_image_bytes = max_image_bytes
+        self._lock = threading.Lock()
+        # cache key -> (filename, size in bytes, content type), least recently used first
+        self._entries = OrderedDict()
+        self._total = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        """Rebuild the LRU index from disk, oldest modification time first."""
+        files = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith('.') or not os.path.isfile(path):
+                continue
+            if os.path.splitext(name)[1] not in EXTENSION_TYPES:
+                # Leftover temp files or entries of a type we no longer serve
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            st = os.stat(path)
+            files.append((st.st_mtime, name, st.st_size))
+        for _, name, nbytes in sorted(files):
+            key, ext = os.path.splitext(name)
+            self._entries[key] = (name, nbytes, EXTENSION_TYPES[ext])
+            self._total += nbytes
+        self._evict()
+
+    @staticmethod
+    def make_key(url, size):
+        return hashlib.sha1(f'{size}|{url}'.encode('utf-8')).hexdigest()
+
+    @property
+    def total_bytes(self):
+        return self._total
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _evict(self):
+        # Always keep the newest entry so the caller can still serve it
+        while self._total > self.max_bytes and len(self._entries) > 1:
+            _, (name, nbytes, _) = self._entries.popitem(last=False)
+            self._total -= nbytes
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+
+    def get(self, url, size):
+        """
+        Return (bytes, content_type) for the cached variant, fetching it on a miss.
+        Bytes are read under the lock so a concurrent eviction cannot remove
+        the file first. Raises a RejectedImage subclass for non-image or
+        oversized responses (nothing is cached) and whatever the fetcher
+        raises on failure.
+        """
+        key = self.make_key(url, size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                name, nbytes, content_type = entry
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                    os.utime(path)
+                    self._entries.move_to_end(key)
+                    return data, content_type
+                except OSError:
+                    # File removed behind our back; fall through and refetch
+                    del self._entries[key]
+                    self._total -= nbytes
+
+        src = sized_url(url, size)
+        data, content_type = self.fetcher(src)
+        content_type = check_content_type(content_type)
+        # Pluggable fetchers may not enforce the cap themselves
+        if len(data) > self.max_image_bytes:
+            raise ImageTooLarge(f'{len(data)} bytes')
+        if src == url:
+            data = resize_image(data, size)
+        name = key + IMAGE_TYPES[content_type]
+        path = os.path.join(self.cache_dir, name)
+        tmp = path + f'.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._total -= old[1]
+                if old[0] != name:
+                    try:
+                        os.remove(os.path.join(self.cache_dir, old[0]))
+                    except OSError:
+                        pass
+            self._entries[key] = (name, len(data), content_type)
+            self._total += len(data)
+            self._evict()
+        return data, content_type
+
+    def warm(self, urls, sizes):
+        """Fetch every (url, size) variant not already cached. Returns the failure count."""
+        failures = 0
+        for url in urls:
+            for size in sizes:
+                if self.make_key(url, size) in self:
+                    continue
+                try:
+                    self.get(url, size)
+                except Exception:
+                    failures += 1
+        return failures
@@ -3,14 +3,24 @@ from tkinter import messagebox
 import sys
 import os
 
-def start_quiz(root):
+def start_catalog_loader():
+    """Begins loading the venue catalog in the background while the launcher is shown."""
+    try:
+        import plur_pgh
+    except ImportError:
+        return None
+    catalog = plur_pgh.CatalogLoader()
+    catalog.start()
+    return catalog
+
+def start_quiz(root, catalog=None):
     """Starts the Pittsburgh Venue Finder quiz."""
     # Close the launcher window
     root.destroy()
-    # Import and run the quiz
+    # Import and run the quiz, reusing the catalog loaded in the background
     try:
         import plur_pgh
-        plur_pgh.main()
+        plur_pgh.main(catalog)
     except ImportError:
         messagebox.showerror("Error", "Could not import the quiz module. Make sure 'plur_pgh.py' is in the same directory.")
     except Exception as e:
@@ -23,6 +33,9 @@ def main():
     root.geometry("700x500")
     root.resizable(True, True)
 
+    # Start reading the catalog now so it is ready (or close) by the time "Start Quiz" is clicked
+    catalog = start_catalog_loader()
+
     # Title label
     title_label = tk.Label(root, text="PLUR PGH",
                           font=("Arial", 24, "bold"), fg="darkblue")
@@ -47,10 +60,24 @@ Ready to find your next favorite spot in Pittsburgh?
 
     # Start Quiz button
     start_button = tk.Button(root, text="Start Quiz", font=("Arial", 16, "bold"),
-                            bg="green", fg="white", command=lambda: start_quiz(root),
+                            bg="green", fg="white", command=lambda: start_quiz(root, catalog),
                             width=20, height=2)
     start_button.pack(pady=30)
 
+    # Catalog loading status
+    status_label = tk.Label(root, text="Loading venues...", font=("Arial", 10), fg="gray")
+    status_label.pack()
+
+    def update_status():
+        if catalog is None:
+            status_label.config(text="")
+        elif catalog.done():
+            status_label.config(text=f"{len(catalog.data)} venues ready")
+        else:
+            root.after(100, update_status)
+
+    root.after(100, update_status)
+
     # Footer
     footer_label = tk.Label(root, text="Built with Python & Tkinter",
                            font=("Arial", 10), fg="gray")